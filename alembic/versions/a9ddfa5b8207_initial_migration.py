@@ -18,11 +18,101 @@ depends_on = None
 
 def upgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
-    pass
+    op.create_table('email_templates',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('subject', sa.String(length=500), nullable=False),
+    sa.Column('html_content', sa.Text(), nullable=False),
+    sa.Column('text_content', sa.Text(), nullable=True),
+    sa.Column('example_variables', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_email_templates_id'), 'email_templates', ['id'], unique=False)
+    op.create_index(op.f('ix_email_templates_name'), 'email_templates', ['name'], unique=True)
+    op.create_table('webhooks',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('name', sa.String(length=255), nullable=False),
+    sa.Column('url', sa.String(length=500), nullable=False),
+    sa.Column('event_type', sa.String(length=50), nullable=False),
+    sa.Column('active', sa.Boolean(), nullable=True),
+    sa.Column('secret_key', sa.String(length=255), nullable=True),
+    sa.Column('headers', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('updated_at', sa.DateTime(timezone=True), nullable=True),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_webhooks_event_type'), 'webhooks', ['event_type'], unique=False)
+    op.create_index(op.f('ix_webhooks_id'), 'webhooks', ['id'], unique=False)
+    op.create_table('emails',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('message_id', sa.String(length=255), nullable=True),
+    sa.Column('from_email', sa.String(length=255), nullable=False),
+    sa.Column('to_email', sa.String(length=255), nullable=False),
+    sa.Column('cc', sa.JSON(), nullable=True),
+    sa.Column('bcc', sa.JSON(), nullable=True),
+    sa.Column('subject', sa.String(length=500), nullable=False),
+    sa.Column('html_content', sa.Text(), nullable=True),
+    sa.Column('text_content', sa.Text(), nullable=True),
+    sa.Column('raw_content', sa.Text(), nullable=True),
+    sa.Column('headers', sa.JSON(), nullable=True),
+    sa.Column('attachments', sa.JSON(), nullable=True),
+    sa.Column('status', sa.Enum('PENDING', 'SENT', 'FAILED', 'RECEIVED', name='emailstatus'), nullable=True),
+    sa.Column('direction', sa.String(length=10), nullable=False),
+    sa.Column('template_id', sa.Integer(), nullable=True),
+    sa.Column('template_variables', sa.JSON(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('sent_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('received_at', sa.DateTime(timezone=True), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.ForeignKeyConstraint(['template_id'], ['email_templates.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_emails_direction'), 'emails', ['direction'], unique=False)
+    op.create_index(op.f('ix_emails_from_email'), 'emails', ['from_email'], unique=False)
+    op.create_index(op.f('ix_emails_id'), 'emails', ['id'], unique=False)
+    op.create_index(op.f('ix_emails_message_id'), 'emails', ['message_id'], unique=True)
+    op.create_index(op.f('ix_emails_status'), 'emails', ['status'], unique=False)
+    op.create_index(op.f('ix_emails_to_email'), 'emails', ['to_email'], unique=False)
+    op.create_table('webhook_deliveries',
+    sa.Column('id', sa.Integer(), nullable=False),
+    sa.Column('webhook_id', sa.Integer(), nullable=False),
+    sa.Column('email_id', sa.Integer(), nullable=False),
+    sa.Column('status', sa.Enum('PENDING', 'SUCCESS', 'FAILED', name='webhookstatus'), nullable=True),
+    sa.Column('response_status', sa.Integer(), nullable=True),
+    sa.Column('response_body', sa.Text(), nullable=True),
+    sa.Column('error_message', sa.Text(), nullable=True),
+    sa.Column('attempts', sa.Integer(), nullable=True),
+    sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.text('now()'), nullable=True),
+    sa.Column('delivered_at', sa.DateTime(timezone=True), nullable=True),
+    sa.ForeignKeyConstraint(['email_id'], ['emails.id'], ),
+    sa.ForeignKeyConstraint(['webhook_id'], ['webhooks.id'], ),
+    sa.PrimaryKeyConstraint('id')
+    )
+    op.create_index(op.f('ix_webhook_deliveries_id'), 'webhook_deliveries', ['id'], unique=False)
+    op.create_index(op.f('ix_webhook_deliveries_status'), 'webhook_deliveries', ['status'], unique=False)
     # ### end Alembic commands ###
 
 
 def downgrade() -> None:
     # ### commands auto generated by Alembic - please adjust! ###
-    pass
+    op.drop_index(op.f('ix_webhook_deliveries_status'), table_name='webhook_deliveries')
+    op.drop_index(op.f('ix_webhook_deliveries_id'), table_name='webhook_deliveries')
+    op.drop_table('webhook_deliveries')
+    op.drop_index(op.f('ix_emails_to_email'), table_name='emails')
+    op.drop_index(op.f('ix_emails_status'), table_name='emails')
+    op.drop_index(op.f('ix_emails_message_id'), table_name='emails')
+    op.drop_index(op.f('ix_emails_id'), table_name='emails')
+    op.drop_index(op.f('ix_emails_from_email'), table_name='emails')
+    op.drop_index(op.f('ix_emails_direction'), table_name='emails')
+    op.drop_table('emails')
+    op.drop_index(op.f('ix_webhooks_id'), table_name='webhooks')
+    op.drop_index(op.f('ix_webhooks_event_type'), table_name='webhooks')
+    op.drop_table('webhooks')
+    op.drop_index(op.f('ix_email_templates_name'), table_name='email_templates')
+    op.drop_index(op.f('ix_email_templates_id'), table_name='email_templates')
+    op.drop_table('email_templates')
+    sa.Enum(name='webhookstatus').drop(op.get_bind(), checkfirst=True)
+    sa.Enum(name='emailstatus').drop(op.get_bind(), checkfirst=True)
     # ### end Alembic commands ###
\ No newline at end of file
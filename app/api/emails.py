@@ -1,37 +1,45 @@
 from fastapi import APIRouter, Depends, HTTPException, status, Query, BackgroundTasks
-from sqlalchemy.orm import Session
+from sqlalchemy import func, tuple_
+from sqlalchemy.orm import Session, load_only, raiseload
 from typing import List, Optional
 from datetime import datetime
 from app.core.database import get_db
-from app.models.email import Email, EmailTemplate, EmailStatus
+from app.core.pagination import encode_cursor, decode_cursor
+from app.models.email import Email, EmailStatus
 from app.schemas.email import (
     EmailSend,
+    EmailBulkSend,
     EmailResponse,
     EmailListResponse,
     EmailFilter
 )
+from app.services.attachment_store import attachment_store
 from app.services.email_sender import email_sender
 from app.services.template_engine import template_engine
-from app.services.webhook import trigger_webhook
-import asyncio
 
 router = APIRouter(prefix="/api/emails", tags=["emails"])
 
+EMAIL_LIST_COLUMNS = (
+    Email.id,
+    Email.message_id,
+    Email.from_email,
+    Email.to_email,
+    Email.subject,
+    Email.status,
+    Email.direction,
+    Email.created_at,
+    Email.sent_at,
+    Email.received_at,
+)
 
-@router.post("/send", response_model=EmailResponse, status_code=status.HTTP_201_CREATED)
-async def send_email(
-    email_data: EmailSend,
-    background_tasks: BackgroundTasks,
-    db: Session = Depends(get_db)
-):
+
+def render_email(db: Session, email_data: EmailSend):
     subject = email_data.subject
     html_content = email_data.html_content
     text_content = email_data.text_content
     
     if email_data.template_name:
-        template = db.query(EmailTemplate).filter(
-            EmailTemplate.name == email_data.template_name
-        ).first()
+        template = template_engine.get_template(db, email_data.template_name)
         
         if not template:
             raise HTTPException(
@@ -41,8 +49,7 @@ async def send_email(
         
         try:
             subject, html_content, text_content = template_engine.render_template(
-                db=db,
-                template_name=email_data.template_name,
+                template,
                 variables=email_data.template_variables
             )
         except Exception as e:
@@ -67,48 +74,88 @@ async def send_email(
                 detail="Either html_content or text_content is required"
             )
     
+    return subject, html_content, text_content, template_id
+
+
+def persist_email(db: Session, email_data: EmailSend, rendered, commit: bool = True):
+    subject, html_content, text_content, template_id = rendered
+    
+    return email_sender.persist_pending(
+        db=db,
+        to_email=email_data.to_email,
+        subject=subject,
+        html_content=html_content,
+        text_content=text_content,
+        from_email=email_data.from_email,
+        cc=email_data.cc,
+        bcc=email_data.bcc,
+        template_id=template_id,
+        template_variables=email_data.template_variables,
+        attachments=email_data.attachments,
+        commit=commit
+    )
+
+
+@router.post("/send", response_model=EmailResponse, status_code=status.HTTP_201_CREATED)
+def send_email(
+    email_data: EmailSend,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    rendered = render_email(db, email_data)
+    
     try:
-        email_record = email_sender.send_email(
-            db=db,
-            to_email=email_data.to_email,
-            subject=subject,
-            html_content=html_content,
-            text_content=text_content,
-            from_email=email_data.from_email,
-            cc=email_data.cc,
-            bcc=email_data.bcc,
-            attachments=email_data.attachments,
-            template_id=template_id,
-            template_variables=email_data.template_variables
-        )
-        
-        if email_record.status == EmailStatus.SENT:
-            background_tasks.add_task(
-                trigger_webhook,
-                db,
-                "email.sent",
-                email_record
-            )
-        else:
-            background_tasks.add_task(
-                trigger_webhook,
-                db,
-                "email.failed",
-                email_record
-            )
-        
-        return email_record
-        
+        email_record = persist_email(db, email_data, rendered)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to send email: {str(e)}"
         )
+    
+    background_tasks.add_task(email_sender.deliver_async, email_record.id)
+    
+    return email_record
+
+
+@router.post("/send/bulk", response_model=List[EmailResponse], status_code=status.HTTP_201_CREATED)
+def send_bulk_emails(
+    bulk_data: EmailBulkSend,
+    background_tasks: BackgroundTasks,
+    db: Session = Depends(get_db)
+):
+    rendered = [render_email(db, email_data) for email_data in bulk_data.messages]
+    
+    email_records = []
+    try:
+        for email_data, rendered_email in zip(bulk_data.messages, rendered):
+            email_records.append(persist_email(db, email_data, rendered_email, commit=False))
+        db.commit()
+    except Exception as e:
+        # The batch rolls back, so no row points at attachments already written
+        stored_ids = [
+            email_record.id
+            for email_record in email_records
+            if email_record.attachments
+        ]
+        db.rollback()
+        for email_id in stored_ids:
+            attachment_store.delete(email_id)
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to send emails: {str(e)}"
+        )
+    
+    background_tasks.add_task(
+        email_sender.deliver_bulk_async,
+        [email_record.id for email_record in email_records]
+    )
+    
+    return email_records
 
 
 @router.get("/", response_model=EmailListResponse)
 def list_emails(
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = None,
     per_page: int = Query(50, ge=1, le=100),
     to_email: Optional[str] = None,
     from_email: Optional[str] = None,
@@ -116,9 +163,13 @@ def list_emails(
     direction: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Email)
+    query = db.query(Email).options(
+        load_only(*EMAIL_LIST_COLUMNS, raiseload=True),
+        raiseload("*")
+    )
     
     if to_email:
         query = query.filter(Email.to_email == to_email)
@@ -138,30 +189,53 @@ def list_emails(
     if end_date:
         query = query.filter(Email.created_at <= end_date)
     
-    total = query.count()
+    if cursor:
+        created_at, email_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Email.created_at, Email.id) < tuple_(created_at, email_id)
+        )
+    
+    with_total = include_total and not cursor
+    if with_total:
+        query = query.add_columns(func.count().over().label("total"))
+    
+    emails = query.order_by(
+        Email.created_at.desc(),
+        Email.id.desc()
+    ).limit(per_page + 1).all()
     
-    emails = query.order_by(Email.created_at.desc()).offset(
-        (page - 1) * per_page
-    ).limit(per_page).all()
+    total = None
+    if with_total:
+        total = emails[0].total if emails else 0
+        emails = [row[0] for row in emails]
+    
+    next_cursor = None
+    if len(emails) > per_page:
+        emails = emails[:per_page]
+        next_cursor = encode_cursor(emails[-1].created_at, emails[-1].id)
     
     return EmailListResponse(
         emails=emails,
+        next_cursor=next_cursor,
         total=total,
-        page=page,
         per_page=per_page
     )
 
 
 @router.get("/received", response_model=EmailListResponse)
 def list_received_emails(
-    page: int = Query(1, ge=1),
+    cursor: Optional[str] = None,
     per_page: int = Query(50, ge=1, le=100),
     recipient: Optional[str] = None,
     start_date: Optional[datetime] = None,
     end_date: Optional[datetime] = None,
+    include_total: bool = False,
     db: Session = Depends(get_db)
 ):
-    query = db.query(Email).filter(Email.direction == "inbound")
+    query = db.query(Email).options(
+        load_only(*EMAIL_LIST_COLUMNS, raiseload=True),
+        raiseload("*")
+    ).filter(Email.direction == "inbound")
     
     if recipient:
         query = query.filter(Email.to_email == recipient)
@@ -172,16 +246,35 @@ def list_received_emails(
     if end_date:
         query = query.filter(Email.received_at <= end_date)
     
-    total = query.count()
+    if cursor:
+        received_at, email_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(Email.received_at, Email.id) < tuple_(received_at, email_id)
+        )
+    
+    with_total = include_total and not cursor
+    if with_total:
+        query = query.add_columns(func.count().over().label("total"))
+    
+    emails = query.order_by(
+        Email.received_at.desc(),
+        Email.id.desc()
+    ).limit(per_page + 1).all()
     
-    emails = query.order_by(Email.received_at.desc()).offset(
-        (page - 1) * per_page
-    ).limit(per_page).all()
+    total = None
+    if with_total:
+        total = emails[0].total if emails else 0
+        emails = [row[0] for row in emails]
+    
+    next_cursor = None
+    if len(emails) > per_page:
+        emails = emails[:per_page]
+        next_cursor = encode_cursor(emails[-1].received_at, emails[-1].id)
     
     return EmailListResponse(
         emails=emails,
+        next_cursor=next_cursor,
         total=total,
-        page=page,
         per_page=per_page
     )
 
@@ -223,22 +316,24 @@ def delete_email(
     email_id: int,
     db: Session = Depends(get_db)
 ):
-    email = db.query(Email).filter(Email.id == email_id).first()
+    deleted = db.query(Email).filter(
+        Email.id == email_id
+    ).delete(synchronize_session=False)
     
-    if not email:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Email with id {email_id} not found"
         )
     
-    db.delete(email)
     db.commit()
+    attachment_store.delete(email_id)
     
     return None
 
 
 @router.post("/{email_id}/resend", response_model=EmailResponse)
-async def resend_email(
+def resend_email(
     email_id: int,
     background_tasks: BackgroundTasks,
     db: Session = Depends(get_db)
@@ -258,7 +353,7 @@ async def resend_email(
         )
     
     try:
-        email_record = email_sender.send_email(
+        email_record = email_sender.persist_pending(
             db=db,
             to_email=original_email.to_email,
             subject=original_email.subject,
@@ -267,30 +362,16 @@ async def resend_email(
             from_email=original_email.from_email,
             cc=original_email.cc,
             bcc=original_email.bcc,
-            attachments=original_email.attachments,
             template_id=original_email.template_id,
-            template_variables=original_email.template_variables
+            template_variables=original_email.template_variables,
+            attachments=attachment_store.load_attachments(original_email.attachments or [])
         )
-        
-        if email_record.status == EmailStatus.SENT:
-            background_tasks.add_task(
-                trigger_webhook,
-                db,
-                "email.sent",
-                email_record
-            )
-        else:
-            background_tasks.add_task(
-                trigger_webhook,
-                db,
-                "email.failed",
-                email_record
-            )
-        
-        return email_record
-        
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to resend email: {str(e)}"
-        )
\ No newline at end of file
+        )
+    
+    background_tasks.add_task(email_sender.deliver_async, email_record.id)
+    
+    return email_record
\ No newline at end of file
@@ -1,8 +1,9 @@
 from fastapi import APIRouter, Depends, HTTPException, status
+from sqlalchemy import delete
 from sqlalchemy.orm import Session
 from typing import List
 from app.core.database import get_db
-from app.models.email import EmailTemplate
+from app.models.email import Email, EmailTemplate
 from app.schemas.email import (
     EmailTemplateCreate,
     EmailTemplateUpdate,
@@ -18,11 +19,11 @@ def create_template(
     template: EmailTemplateCreate,
     db: Session = Depends(get_db)
 ):
-    existing = db.query(EmailTemplate).filter(
+    existing = db.query(EmailTemplate.id).filter(
         EmailTemplate.name == template.name
     ).first()
     
-    if existing:
+    if existing is not None:
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST,
             detail=f"Template with name '{template.name}' already exists"
@@ -41,10 +42,21 @@ def create_template(
             detail=f"Template validation failed: {str(e)}"
         )
     
-    db_template = EmailTemplate(**template.dict())
+    compiled_cache = template_engine.compile_template(
+        template.name,
+        template.html_content,
+        template.text_content,
+        template.subject
+    )
+    
+    # updated_at is set explicitly so eager_defaults does not reload it with a SELECT
+    db_template = EmailTemplate(
+        **template.model_dump(),
+        compiled_cache=compiled_cache,
+        updated_at=None
+    )
     db.add(db_template)
     db.commit()
-    db.refresh(db_template)
     
     return db_template
 
@@ -82,9 +94,7 @@ def get_template_by_name(
     template_name: str,
     db: Session = Depends(get_db)
 ):
-    template = db.query(EmailTemplate).filter(
-        EmailTemplate.name == template_name
-    ).first()
+    template = template_engine.get_template(db, template_name)
     
     if not template:
         raise HTTPException(
@@ -111,7 +121,7 @@ def update_template(
             detail=f"Template with id {template_id} not found"
         )
     
-    update_data = template_update.dict(exclude_unset=True)
+    update_data = template_update.model_dump(exclude_unset=True)
     
     if update_data:
         try:
@@ -127,11 +137,21 @@ def update_template(
                 detail=f"Template validation failed: {str(e)}"
             )
         
+        previous_name = template.name
+        
         for field, value in update_data.items():
             setattr(template, field, value)
         
+        # The compiled code embeds the template name, so renames recompile too
+        template.compiled_cache = template_engine.compile_template(
+            template.name,
+            template.html_content,
+            template.text_content,
+            template.subject
+        )
+        
         db.commit()
-        db.refresh(template)
+        template_engine.invalidate_template(previous_name, template.name)
     
     return template
 
@@ -141,18 +161,24 @@ def delete_template(
     template_id: int,
     db: Session = Depends(get_db)
 ):
-    template = db.query(EmailTemplate).filter(
-        EmailTemplate.id == template_id
-    ).first()
+    db.query(Email).filter(
+        Email.template_id == template_id
+    ).update({Email.template_id: None}, synchronize_session=False)
     
-    if not template:
+    deleted_name = db.execute(
+        delete(EmailTemplate).where(
+            EmailTemplate.id == template_id
+        ).returning(EmailTemplate.name)
+    ).scalar()
+    
+    if deleted_name is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Template with id {template_id} not found"
         )
     
-    db.delete(template)
     db.commit()
+    template_engine.invalidate_template(deleted_name)
     
     return None
 
@@ -175,8 +201,7 @@ def preview_template(
     
     try:
         subject, html_content, text_content = template_engine.render_template(
-            db=db,
-            template_name=template.name,
+            template,
             variables=variables
         )
         
@@ -1,7 +1,9 @@
-from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi import APIRouter, Depends, HTTPException, status, Query, Response
+from sqlalchemy import tuple_
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.core.database import get_db
+from app.core.pagination import encode_cursor, decode_cursor
 from app.models.email import Webhook, WebhookDelivery
 from app.schemas.email import (
     WebhookCreate,
@@ -9,6 +11,7 @@ from app.schemas.email import (
     WebhookResponse,
     WebhookDeliveryResponse
 )
+from app.services.webhook import webhook_service
 
 router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
 
@@ -18,10 +21,11 @@ def create_webhook(
     webhook: WebhookCreate,
     db: Session = Depends(get_db)
 ):
-    db_webhook = Webhook(**webhook.dict())
+    # updated_at is set explicitly so eager_defaults does not reload it with a SELECT
+    db_webhook = Webhook(**webhook.model_dump(), updated_at=None)
     db.add(db_webhook)
     db.commit()
-    db.refresh(db_webhook)
+    webhook_service.invalidate_active_webhooks()
     
     return db_webhook
 
@@ -72,13 +76,14 @@ def update_webhook(
             detail=f"Webhook with id {webhook_id} not found"
         )
     
-    update_data = webhook_update.dict(exclude_unset=True)
+    update_data = webhook_update.model_dump(exclude_unset=True)
     
     for field, value in update_data.items():
         setattr(webhook, field, value)
     
     db.commit()
-    db.refresh(webhook)
+    webhook_service.invalidate_signing_key(webhook_id)
+    webhook_service.invalidate_active_webhooks()
     
     return webhook
 
@@ -88,16 +93,19 @@ def delete_webhook(
     webhook_id: int,
     db: Session = Depends(get_db)
 ):
-    webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    deleted = db.query(Webhook).filter(
+        Webhook.id == webhook_id
+    ).delete(synchronize_session=False)
     
-    if not webhook:
+    if not deleted:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Webhook with id {webhook_id} not found"
         )
     
-    db.delete(webhook)
     db.commit()
+    webhook_service.invalidate_signing_key(webhook_id)
+    webhook_service.invalidate_active_webhooks()
     
     return None
 
@@ -105,23 +113,39 @@ def delete_webhook(
 @router.get("/{webhook_id}/deliveries", response_model=List[WebhookDeliveryResponse])
 def get_webhook_deliveries(
     webhook_id: int,
-    skip: int = 0,
-    limit: int = 100,
+    response: Response,
+    cursor: Optional[str] = None,
+    limit: int = Query(100, ge=1, le=100),
     db: Session = Depends(get_db)
 ):
-    webhook = db.query(Webhook).filter(Webhook.id == webhook_id).first()
+    query = db.query(WebhookDelivery).filter(
+        WebhookDelivery.webhook_id == webhook_id
+    )
     
-    if not webhook:
+    if cursor:
+        created_at, delivery_id = decode_cursor(cursor)
+        query = query.filter(
+            tuple_(WebhookDelivery.created_at, WebhookDelivery.id) < tuple_(created_at, delivery_id)
+        )
+    
+    deliveries = query.order_by(
+        WebhookDelivery.created_at.desc(),
+        WebhookDelivery.id.desc()
+    ).limit(limit + 1).all()
+    
+    # Only an empty page needs the existence check to tell 404 from no deliveries
+    if not deliveries and db.query(Webhook.id).filter(Webhook.id == webhook_id).first() is None:
         raise HTTPException(
             status_code=status.HTTP_404_NOT_FOUND,
             detail=f"Webhook with id {webhook_id} not found"
         )
     
-    deliveries = db.query(WebhookDelivery).filter(
-        WebhookDelivery.webhook_id == webhook_id
-    ).order_by(
-        WebhookDelivery.created_at.desc()
-    ).offset(skip).limit(limit).all()
+    if len(deliveries) > limit:
+        deliveries = deliveries[:limit]
+        response.headers["X-Next-Cursor"] = encode_cursor(
+            deliveries[-1].created_at,
+            deliveries[-1].id
+        )
     
     return deliveries
 
@@ -140,10 +164,10 @@ async def test_webhook(
         )
     
     from app.models.email import Email, EmailStatus
-    from app.services.webhook import webhook_service
-    from datetime import datetime
+    from datetime import datetime, timezone
     import uuid
     
+    now = datetime.now(timezone.utc)
     test_email = Email(
         message_id=f"test-{uuid.uuid4()}",
         from_email="test@example.com",
@@ -153,15 +177,12 @@ async def test_webhook(
         text_content="This is a test email for webhook testing",
         status=EmailStatus.SENT,
         direction="outbound",
-        created_at=datetime.utcnow(),
-        sent_at=datetime.utcnow()
+        created_at=now,
+        sent_at=now
     )
     
-    db.add(test_email)
-    db.commit()
-    
     try:
-        delivery = await webhook_service.send_webhook(db, webhook, test_email)
+        delivery = await webhook_service.send_webhook(webhook, test_email)
         
         return {
             "success": delivery.status.value == "success",
@@ -174,7 +195,4 @@ async def test_webhook(
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to test webhook: {str(e)}"
-        )
-    finally:
-        db.delete(test_email)
-        db.commit()
\ No newline at end of file
+        )
\ No newline at end of file
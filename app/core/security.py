@@ -1,12 +1,15 @@
 from fastapi import Security, HTTPException, status
 from fastapi.security import APIKeyHeader
 from app.core.config import settings
+import hmac
 
 api_key_header = APIKeyHeader(name="X-API-Key", auto_error=False)
 
+_API_KEY_BYTES = settings.API_KEY.encode()
+
 
 async def get_api_key(api_key: str = Security(api_key_header)):
-    if api_key == settings.API_KEY:
+    if api_key and hmac.compare_digest(api_key.encode(), _API_KEY_BYTES):
         return api_key
     
     raise HTTPException(
@@ -1,5 +1,6 @@
 from fastapi import FastAPI, Depends
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import ORJSONResponse
 from contextlib import asynccontextmanager
 import logging
 from app.core.database import engine
@@ -7,6 +8,9 @@ from app.core.config import settings
 from app.core.security import get_api_key
 from app.models import email as models
 from app.api import templates, emails, webhooks
+from app.services.email_sender import email_sender
+from app.services.webhook import webhook_service
+from app.services.webhook_queue import webhook_queue
 from app.smtp.server import smtp_server
 
 logging.basicConfig(level=logging.INFO)
@@ -15,10 +19,14 @@ logger = logging.getLogger(__name__)
 
 @asynccontextmanager
 async def lifespan(app: FastAPI):
-    models.Base.metadata.create_all(bind=engine)
+    if settings.AUTO_CREATE_TABLES:
+        models.Base.metadata.create_all(bind=engine)
+    
+    webhook_queue.start(settings.WEBHOOK_WORKERS)
     
     smtp_server.host = settings.SMTP_HOST
     smtp_server.port = settings.SMTP_PORT
+    smtp_server.data_size_limit = settings.SMTP_DATA_SIZE_LIMIT
     smtp_server.start()
     logger.info(f"SMTP server started on {settings.SMTP_HOST}:{settings.SMTP_PORT}")
     
@@ -26,21 +34,28 @@ async def lifespan(app: FastAPI):
     
     smtp_server.stop()
     logger.info("SMTP server stopped")
+    
+    # Finish in-flight deliveries first so their sent/failed events still reach the queue
+    email_sender.close()
+    await webhook_queue.stop()
+    await webhook_service.close()
 
 
 app = FastAPI(
     title="Hermes Email Service",
     description="Transactional email service with SMTP receiver, templating, and webhooks",
     version="1.0.0",
-    lifespan=lifespan
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse
 )
 
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],
+    allow_origins=settings.CORS_ORIGINS,
     allow_credentials=True,
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_methods=["GET", "POST", "PATCH", "DELETE"],
+    allow_headers=["X-API-Key", "Content-Type"],
+    max_age=86400
 )
 
 app.include_router(
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Enum
+from sqlalchemy import Column, Integer, String, Text, DateTime, Boolean, ForeignKey, JSON, Enum, Index, LargeBinary
+from sqlalchemy.dialects.postgresql import JSONB
 from sqlalchemy.orm import relationship
-from sqlalchemy.sql import func
+from sqlalchemy.sql import func, text
 from app.core.database import Base
 import enum
 
@@ -18,8 +19,15 @@ class WebhookStatus(str, enum.Enum):
     FAILED = "failed"
 
 
+class WebhookEventType(str, enum.Enum):
+    RECEIVED = "email.received"
+    SENT = "email.sent"
+    FAILED = "email.failed"
+
+
 class EmailTemplate(Base):
     __tablename__ = "email_templates"
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), unique=True, nullable=False, index=True)
@@ -27,6 +35,7 @@ class EmailTemplate(Base):
     html_content = Column(Text, nullable=False)
     text_content = Column(Text, nullable=True)
     example_variables = Column(JSON, nullable=True)
+    compiled_cache = Column(LargeBinary, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
@@ -35,6 +44,19 @@ class EmailTemplate(Base):
 
 class Email(Base):
     __tablename__ = "emails"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_emails_created_at_id", "created_at", "id"),
+        Index("ix_emails_direction_created_at_id", "direction", "created_at", "id"),
+        Index("ix_emails_status_created_at_id", "status", "created_at", "id"),
+        Index("ix_emails_to_email_created_at_id", "to_email", "created_at", "id"),
+        Index(
+            "ix_emails_inbound_received_at_id",
+            "received_at",
+            "id",
+            postgresql_where=text("direction = 'inbound'")
+        ),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     message_id = Column(String(255), unique=True, index=True)
@@ -45,9 +67,9 @@ class Email(Base):
     subject = Column(String(500), nullable=False)
     html_content = Column(Text, nullable=True)
     text_content = Column(Text, nullable=True)
-    raw_content = Column(Text, nullable=True)
-    headers = Column(JSON, nullable=True)
-    attachments = Column(JSON, nullable=True)
+    raw_content = Column(LargeBinary, nullable=True)
+    headers = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
+    attachments = Column(JSON().with_variant(JSONB(), "postgresql"), nullable=True)
     status = Column(Enum(EmailStatus), default=EmailStatus.PENDING, index=True)
     direction = Column(String(10), nullable=False, index=True)
     template_id = Column(Integer, ForeignKey("email_templates.id"), nullable=True)
@@ -63,6 +85,7 @@ class Email(Base):
 
 class Webhook(Base):
     __tablename__ = "webhooks"
+    __mapper_args__ = {"eager_defaults": True}
     
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(255), nullable=False)
@@ -79,6 +102,10 @@ class Webhook(Base):
 
 class WebhookDelivery(Base):
     __tablename__ = "webhook_deliveries"
+    __mapper_args__ = {"eager_defaults": True}
+    __table_args__ = (
+        Index("ix_webhook_deliveries_webhook_created_at_id", "webhook_id", "created_at", "id"),
+    )
     
     id = Column(Integer, primary_key=True, index=True)
     webhook_id = Column(Integer, ForeignKey("webhooks.id"), nullable=False)
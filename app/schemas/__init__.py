@@ -3,7 +3,10 @@ from app.schemas.email import (
     EmailTemplateUpdate,
     EmailTemplateResponse,
     EmailSend,
+    EmailBulkSend,
+    EmailAttachment,
     EmailResponse,
+    EmailListItem,
     EmailListResponse,
     WebhookCreate,
     WebhookUpdate,
@@ -15,7 +18,10 @@ __all__ = [
     "EmailTemplateUpdate",
     "EmailTemplateResponse",
     "EmailSend",
+    "EmailBulkSend",
+    "EmailAttachment",
     "EmailResponse",
+    "EmailListItem",
     "EmailListResponse",
     "WebhookCreate",
     "WebhookUpdate",
@@ -1,7 +1,7 @@
 from pydantic import BaseModel, EmailStr, Field, ConfigDict
 from typing import Optional, List, Dict, Any
 from datetime import datetime
-from app.models.email import EmailStatus, WebhookStatus
+from app.models.email import EmailStatus, WebhookStatus, WebhookEventType
 
 
 class EmailTemplateBase(BaseModel):
@@ -45,6 +45,16 @@ class EmailSend(BaseModel):
     attachments: Optional[List[Dict[str, Any]]] = None
 
 
+class EmailBulkSend(BaseModel):
+    messages: List[EmailSend] = Field(..., min_length=1, max_length=1000)
+
+
+class EmailAttachment(BaseModel):
+    filename: Optional[str] = None
+    content_type: Optional[str] = None
+    size: Optional[int] = None
+
+
 class EmailResponse(BaseModel):
     model_config = ConfigDict(from_attributes=True)
     
@@ -60,16 +70,34 @@ class EmailResponse(BaseModel):
     status: EmailStatus
     direction: str
     template_id: Optional[int] = None
+    attachments: Optional[List[EmailAttachment]] = None
     created_at: datetime
     sent_at: Optional[datetime] = None
     received_at: Optional[datetime] = None
     error_message: Optional[str] = None
 
 
+class EmailListItem(BaseModel):
+    model_config = ConfigDict(from_attributes=True)
+    
+    id: int
+    message_id: str
+    from_email: str
+    to_email: str
+    subject: str
+    status: EmailStatus
+    direction: str
+    created_at: datetime
+    sent_at: Optional[datetime] = None
+    received_at: Optional[datetime] = None
+
+
 class EmailListResponse(BaseModel):
-    emails: List[EmailResponse]
-    total: int
-    page: int = 1
+    model_config = ConfigDict(from_attributes=True)
+    
+    emails: List[EmailListItem]
+    next_cursor: Optional[str] = None
+    total: Optional[int] = None
     per_page: int = 50
 
 
@@ -85,7 +113,7 @@ class EmailFilter(BaseModel):
 class WebhookBase(BaseModel):
     name: str = Field(..., min_length=1, max_length=255)
     url: str = Field(..., min_length=1, max_length=500)
-    event_type: str = Field(..., pattern="^(email.received|email.sent|email.failed)$")
+    event_type: WebhookEventType
     active: bool = True
     secret_key: Optional[str] = None
     headers: Optional[Dict[str, str]] = None
@@ -98,7 +126,7 @@ class WebhookCreate(WebhookBase):
 class WebhookUpdate(BaseModel):
     name: Optional[str] = Field(None, min_length=1, max_length=255)
     url: Optional[str] = Field(None, min_length=1, max_length=500)
-    event_type: Optional[str] = Field(None, pattern="^(email.received|email.sent|email.failed)$")
+    event_type: Optional[WebhookEventType] = None
     active: Optional[bool] = None
     secret_key: Optional[str] = None
     headers: Optional[Dict[str, str]] = None
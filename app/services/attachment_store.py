@@ -0,0 +1,84 @@
+import re
+import shutil
+from pathlib import Path
+from typing import Dict, Any, List
+from app.core.config import settings
+
+PUBLIC_FIELDS = ("filename", "content_type", "size")
+DEFAULT_CONTENT_TYPE = "application/octet-stream"
+CONTENT_TYPE_PATTERN = re.compile(r"[A-Za-z0-9][\w!#$&^.+-]*/[A-Za-z0-9][\w!#$&^.+-]*", re.ASCII)
+
+
+class AttachmentStore:
+    def __init__(self, base_path: str = "attachments"):
+        self.base_path = Path(base_path).resolve()
+    
+    def _email_dir(self, email_id: int) -> Path:
+        return self.base_path / str(email_id)
+    
+    def put(self, email_id: int, index: int, content: bytes) -> str:
+        email_dir = self._email_dir(email_id)
+        email_dir.mkdir(parents=True, exist_ok=True)
+        (email_dir / str(index)).write_bytes(content)
+        
+        # Keys are relative so rows survive a move of the storage directory
+        return f"{email_id}/{index}"
+    
+    def get(self, key: str) -> bytes:
+        path = (self.base_path / key).resolve()
+        if not path.is_relative_to(self.base_path):
+            raise ValueError(f"Attachment key outside storage directory: {key}")
+        
+        return path.read_bytes()
+    
+    def store_attachments(self, email_id: int, attachments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        stored = []
+        
+        for index, attachment in enumerate(attachments):
+            if "content" not in attachment or "filename" not in attachment:
+                continue
+            
+            content = attachment["content"]
+            if isinstance(content, str):
+                content = content.encode("utf-8")
+            
+            # Anything that is not type/subtype would fail MIME assembly long after the request returned
+            content_type = attachment.get("content_type")
+            if not isinstance(content_type, str) or not CONTENT_TYPE_PATTERN.fullmatch(content_type):
+                content_type = DEFAULT_CONTENT_TYPE
+            
+            stored.append({
+                "filename": attachment["filename"],
+                "content_type": content_type,
+                "size": len(content),
+                "key": self.put(email_id, index, content)
+            })
+        
+        return stored
+    
+    def load_attachments(self, attachments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        loaded = []
+        
+        for attachment in attachments:
+            if not attachment.get("key"):
+                continue
+            
+            loaded.append({
+                "filename": attachment["filename"],
+                "content_type": attachment.get("content_type"),
+                "content": self.get(attachment["key"])
+            })
+        
+        return loaded
+    
+    def public_metadata(self, attachments: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [
+            {field: attachment.get(field) for field in PUBLIC_FIELDS}
+            for attachment in attachments
+        ]
+    
+    def delete(self, email_id: int):
+        shutil.rmtree(self._email_dir(email_id), ignore_errors=True)
+
+
+attachment_store = AttachmentStore(settings.ATTACHMENT_STORAGE_PATH)
\ No newline at end of file
@@ -0,0 +1,25 @@
+import dkim
+
+DKIM_INCLUDE_HEADERS = [b"From", b"To", b"Subject", b"Date", b"Message-ID"]
+
+SIGNATURE_ALGORITHMS = {
+    "rsa": b"rsa-sha256",
+    "ed25519": b"ed25519-sha256",
+}
+
+
+def sign(
+    message: bytes,
+    selector: bytes,
+    domain: bytes,
+    private_key: bytes,
+    signature_algorithm: bytes = b"rsa-sha256"
+) -> bytes:
+    return dkim.sign(
+        message,
+        selector,
+        domain,
+        private_key,
+        signature_algorithm=signature_algorithm,
+        include_headers=DKIM_INCLUDE_HEADERS
+    )
\ No newline at end of file
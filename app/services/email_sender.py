@@ -3,20 +3,186 @@ import ssl
 from email.mime.text import MIMEText
 from email.mime.multipart import MIMEMultipart
 from email.mime.base import MIMEBase
-from email import encoders
-import dkim
+from email.generator import BytesGenerator
+from email import policy
+import base64
+import hashlib
+import io
+import asyncio
 import dns.resolver
-from datetime import datetime
-from typing import Optional, List, Dict, Any
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from datetime import datetime, timezone
+from email.utils import format_datetime
+from typing import Optional, List, Dict, Any, Callable, Tuple
+import threading
+import time
 import uuid
 from pathlib import Path
 from app.core.config import settings
-from app.models.email import Email, EmailStatus
+from app.core.database import SessionLocal
+from app.models.email import Email, EmailStatus, WebhookEventType
+from app.services import dkim_signer
+from app.services.attachment_store import attachment_store
+from app.services.webhook_queue import webhook_queue
 from sqlalchemy.orm import Session
 import logging
 
 logger = logging.getLogger(__name__)
 
+MX_NEGATIVE_TTL = 60
+MAX_CONCURRENT_DOMAINS = 20
+SMTP_POLICY = policy.compat32.clone(linesep="\r\n")
+
+
+class PipeliningMixin:
+    def sendmail(self, from_addr, to_addrs, msg, mail_options=(), rcpt_options=()):
+        self.ehlo_or_helo_if_needed()
+        
+        # SMTPUTF8 switches the command encoding inside mail(), so leave it to smtplib
+        if not self.has_extn("pipelining") or any(o.lower() == "smtputf8" for o in mail_options):
+            return super().sendmail(from_addr, to_addrs, msg, mail_options, rcpt_options)
+        
+        if isinstance(msg, str):
+            msg = smtplib._fix_eols(msg).encode("ascii")
+        if isinstance(to_addrs, str):
+            to_addrs = [to_addrs]
+        
+        mail_opts = list(mail_options)
+        if self.has_extn("size"):
+            mail_opts.insert(0, "size=%d" % len(msg))
+        
+        mail_args = "".join(" " + o for o in mail_opts)
+        rcpt_args = "".join(" " + o for o in rcpt_options)
+        commands = [f"mail FROM:{smtplib.quoteaddr(from_addr)}{mail_args}"]
+        commands += [f"rcpt TO:{smtplib.quoteaddr(addr)}{rcpt_args}" for addr in to_addrs]
+        commands.append("data")
+        self.send("".join(command + smtplib.CRLF for command in commands))
+        
+        mail_code, mail_resp = self.getreply()
+        senderrs = {}
+        rcpt_codes = []
+        for addr in to_addrs:
+            code, resp = self.getreply()
+            rcpt_codes.append(code)
+            if code not in (250, 251):
+                senderrs[addr] = (code, resp)
+        data_code, data_resp = self.getreply()
+        
+        if mail_code != 250 or len(senderrs) == len(to_addrs) or data_code != 354:
+            if data_code == 354:
+                # The server took DATA anyway; an empty body lets it reject the transaction
+                self.send(b"." + smtplib.bCRLF)
+                self.getreply()
+            
+            if 421 in (mail_code, data_code, *rcpt_codes):
+                self.close()
+            else:
+                self._rset()
+            
+            if mail_code != 250:
+                raise smtplib.SMTPSenderRefused(mail_code, mail_resp, from_addr)
+            if len(senderrs) == len(to_addrs):
+                raise smtplib.SMTPRecipientsRefused(senderrs)
+            raise smtplib.SMTPDataError(data_code, data_resp)
+        
+        body = smtplib._quote_periods(msg)
+        if body[-2:] != smtplib.bCRLF:
+            body += smtplib.bCRLF
+        self.send(body + b"." + smtplib.bCRLF)
+        
+        code, resp = self.getreply()
+        if code != 250:
+            if code == 421:
+                self.close()
+            else:
+                self._rset()
+            raise smtplib.SMTPDataError(code, resp)
+        
+        return senderrs
+
+
+class PipeliningSMTP(PipeliningMixin, smtplib.SMTP):
+    pass
+
+
+class PipeliningSMTP_SSL(PipeliningMixin, smtplib.SMTP_SSL):
+    pass
+
+
+class PooledSMTP:
+    def __init__(self, server: smtplib.SMTP):
+        self.server = server
+        self.messages_sent = 0
+        self.last_used = time.monotonic()
+    
+    def is_alive(self) -> bool:
+        try:
+            return self.server.noop()[0] == 250
+        except (smtplib.SMTPException, OSError):
+            return False
+    
+    def close(self):
+        try:
+            self.server.quit()
+        except (smtplib.SMTPException, OSError):
+            self.server.close()
+
+
+class SMTPConnectionPool:
+    def __init__(
+        self,
+        max_messages_per_connection: int = 1000,
+        idle_timeout: float = 60,
+        probe_after: float = 5
+    ):
+        self.max_messages_per_connection = max_messages_per_connection
+        self.idle_timeout = idle_timeout
+        self.probe_after = probe_after
+        self._idle: Dict[Tuple, List[PooledSMTP]] = {}
+        self._lock = threading.Lock()
+    
+    def acquire(self, key: Tuple, connect: Callable[[], smtplib.SMTP]) -> PooledSMTP:
+        while True:
+            with self._lock:
+                idle = self._idle.get(key)
+                connection = idle.pop() if idle else None
+            
+            if connection is None:
+                return PooledSMTP(connect())
+            
+            # A NOOP costs a round-trip, so only connections idle long enough to have been dropped
+            # are probed; _send_pooled reconnects if a recently used one turns out to be dead
+            idle_for = time.monotonic() - connection.last_used
+            if idle_for > self.idle_timeout or (idle_for > self.probe_after and not connection.is_alive()):
+                connection.close()
+                continue
+            
+            return connection
+    
+    def release(self, key: Tuple, connection: PooledSMTP):
+        connection.messages_sent += 1
+        connection.last_used = time.monotonic()
+        
+        if connection.messages_sent >= self.max_messages_per_connection:
+            connection.close()
+            return
+        
+        with self._lock:
+            self._idle.setdefault(key, []).append(connection)
+    
+    def discard(self, connection: PooledSMTP):
+        connection.close()
+    
+    def close_all(self):
+        with self._lock:
+            connections = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        
+        for connection in connections:
+            connection.close()
+
 
 class EmailSender:
     def __init__(self):
@@ -28,30 +194,96 @@ class EmailSender:
         self.dkim_private_key_path = settings.DKIM_PRIVATE_KEY_PATH
         self.dkim_selector = settings.DKIM_SELECTOR
         self.domain = settings.SMTP_DOMAIN
+        self._dkim_selector_bytes = self.dkim_selector.encode()
+        self._domain_bytes = self.domain.encode()
+        self._dkim_key_bytes: Optional[bytes] = None
+        self._dkim_key_mtime: Optional[float] = None
+        self._dkim_key_lock = threading.Lock()
+        self._dkim_algorithm = dkim_signer.SIGNATURE_ALGORITHMS[settings.DKIM_KEY_ALGORITHM]
+        self._signing_executor: Optional[ProcessPoolExecutor] = None
+        # Deliveries get their own threads so slow SMTP servers cannot exhaust the
+        # threadpool that FastAPI uses for sync endpoints
+        self._delivery_executor = ThreadPoolExecutor(
+            max_workers=settings.OUTBOUND_SMTP_WORKERS,
+            thread_name_prefix="smtp-delivery"
+        )
+        # Caps concurrent MX conversations across all deliveries in the process
+        self._domain_executor = ThreadPoolExecutor(
+            max_workers=MAX_CONCURRENT_DOMAINS,
+            thread_name_prefix="smtp-domain"
+        )
+        self._signing_executor_lock = threading.Lock()
+        self.pipelining = settings.OUTBOUND_SMTP_PIPELINING
+        self.relay_pool = SMTPConnectionPool(settings.OUTBOUND_SMTP_MAX_MESSAGES_PER_CONNECTION)
+        self.mx_pool = SMTPConnectionPool(settings.OUTBOUND_SMTP_MAX_MESSAGES_PER_CONNECTION)
+        self._mx_cache: Dict[str, Tuple[List[str], float]] = {}
+        self._mx_locks: Dict[str, threading.Lock] = {}
+        self._mx_locks_lock = threading.Lock()
     
     def _load_dkim_key(self) -> Optional[bytes]:
         if not self.dkim_private_key_path:
             return None
         
+        key_path = Path(self.dkim_private_key_path)
+        
         try:
-            key_path = Path(self.dkim_private_key_path)
-            if key_path.exists():
-                return key_path.read_bytes()
+            mtime = key_path.stat().st_mtime
+        except FileNotFoundError:
+            return None
         except Exception as e:
             logger.warning(f"Could not load DKIM key: {e}")
+            return None
+        
+        # Re-read only when the file changes so rotated keys still get picked up
+        if mtime != self._dkim_key_mtime:
+            with self._dkim_key_lock:
+                if mtime != self._dkim_key_mtime:
+                    try:
+                        self._dkim_key_bytes = key_path.read_bytes()
+                        self._dkim_key_mtime = mtime
+                    except Exception as e:
+                        logger.warning(f"Could not load DKIM key: {e}")
+                        return None
         
+        return self._dkim_key_bytes
+    
+    def _get_cached_mx_records(self, domain: str) -> Optional[List[str]]:
+        cached = self._mx_cache.get(domain)
+        if cached and time.monotonic() < cached[1]:
+            return cached[0]
         return None
     
     def _get_mx_records(self, domain: str) -> List[str]:
-        try:
-            mx_records = dns.resolver.resolve(domain, 'MX')
-            sorted_mx = sorted(mx_records, key=lambda x: x.preference)
-            return [str(mx.exchange).rstrip('.') for mx in sorted_mx]
-        except Exception as e:
-            logger.error(f"Failed to get MX records for {domain}: {e}")
-            return []
+        mx_records = self._get_cached_mx_records(domain)
+        if mx_records is not None:
+            return mx_records
+        
+        with self._mx_locks_lock:
+            lock = self._mx_locks.setdefault(domain, threading.Lock())
+        
+        # One resolution per domain at a time; concurrent senders wait for its result
+        with lock:
+            mx_records = self._get_cached_mx_records(domain)
+            if mx_records is not None:
+                return mx_records
+            
+            try:
+                answer = dns.resolver.resolve(domain, 'MX', lifetime=5)
+                sorted_mx = sorted(answer, key=lambda x: x.preference)
+                mx_records = [str(mx.exchange).rstrip('.') for mx in sorted_mx]
+                ttl = answer.rrset.ttl
+            except (dns.resolver.NXDOMAIN, dns.resolver.NoAnswer) as e:
+                logger.error(f"No MX records for {domain}: {e}")
+                mx_records = []
+                ttl = MX_NEGATIVE_TTL
+            except Exception as e:
+                logger.error(f"Failed to get MX records for {domain}: {e}")
+                return []
+            
+            self._mx_cache[domain] = (mx_records, time.monotonic() + ttl)
+            return mx_records
     
-    def _send_direct(self, message: MIMEMultipart, from_email: str, recipients: List[str]):
+    def _send_direct(self, message: bytes, from_email: str, recipients: List[str]):
         recipient_domains = {}
         for recipient in recipients:
             domain = recipient.split('@')[1]
@@ -59,56 +291,197 @@ class EmailSender:
                 recipient_domains[domain] = []
             recipient_domains[domain].append(recipient)
         
-        for domain, domain_recipients in recipient_domains.items():
-            mx_servers = self._get_mx_records(domain)
-            if not mx_servers:
-                raise Exception(f"No MX records found for domain {domain}")
-            
-            sent = False
-            last_error = None
-            
-            for mx_server in mx_servers:
-                try:
-                    with smtplib.SMTP(mx_server, 25, timeout=30) as server:
-                        server.ehlo(self.domain)
-                        server.starttls()
-                        server.ehlo(self.domain)
-                        server.send_message(message, from_email, domain_recipients)
-                        sent = True
-                        logger.info(f"Email sent directly to {mx_server} for domain {domain}")
-                        break
-                except Exception as e:
-                    last_error = e
-                    logger.warning(f"Failed to send to {mx_server}: {e}")
-                    continue
+        if len(recipient_domains) == 1:
+            domain, domain_recipients = next(iter(recipient_domains.items()))
+            self._send_domain(message, from_email, domain, domain_recipients)
+            return
+        
+        futures = [
+            self._domain_executor.submit(
+                self._send_domain,
+                message,
+                from_email,
+                domain,
+                domain_recipients
+            )
+            for domain, domain_recipients in recipient_domains.items()
+        ]
+        
+        errors = []
+        for future in futures:
+            try:
+                future.result()
+            except Exception as e:
+                errors.append(str(e))
+        
+        if errors:
+            raise Exception("; ".join(errors))
+    
+    def _send_domain(self, message: bytes, from_email: str, domain: str, domain_recipients: List[str]):
+        mx_servers = self._get_mx_records(domain)
+        if not mx_servers:
+            raise Exception(f"No MX records found for domain {domain}")
+        
+        last_error = None
+        
+        for mx_server in mx_servers:
+            try:
+                self._send_pooled(
+                    self.mx_pool,
+                    (mx_server, 25),
+                    lambda: self._connect_mx(mx_server),
+                    message,
+                    from_email,
+                    domain_recipients
+                )
+                logger.info(f"Email sent directly to {mx_server} for domain {domain}")
+                return
+            except Exception as e:
+                last_error = e
+                logger.warning(f"Failed to send to {mx_server}: {e}")
+                continue
+        
+        raise Exception(f"Failed to send email to any MX server for {domain}: {last_error}")
+    
+    def _connect_relay(self) -> smtplib.SMTP:
+        context = ssl.create_default_context()
+        
+        if self.use_tls:
+            smtp_class = PipeliningSMTP if self.pipelining else smtplib.SMTP
+            server = smtp_class(self.smtp_host, self.smtp_port)
+        else:
+            smtp_class = PipeliningSMTP_SSL if self.pipelining else smtplib.SMTP_SSL
+            server = smtp_class(self.smtp_host, self.smtp_port, context=context)
+        
+        try:
+            if self.use_tls:
+                server.starttls(context=context)
+            if self.smtp_user and self.smtp_password:
+                server.login(self.smtp_user, self.smtp_password)
+        except Exception:
+            server.close()
+            raise
+        
+        return server
+    
+    def _connect_mx(self, mx_server: str) -> smtplib.SMTP:
+        smtp_class = PipeliningSMTP if self.pipelining else smtplib.SMTP
+        server = smtp_class(mx_server, 25, timeout=30)
+        
+        try:
+            server.ehlo(self.domain)
+            server.starttls()
+            server.ehlo(self.domain)
+        except Exception:
+            server.close()
+            raise
+        
+        return server
+    
+    def _send_pooled(
+        self,
+        pool: SMTPConnectionPool,
+        key: Tuple,
+        connect: Callable[[], smtplib.SMTP],
+        message: bytes,
+        from_email: str,
+        recipients: List[str]
+    ):
+        connection = pool.acquire(key, connect)
+        
+        try:
+            connection.server.sendmail(from_email, recipients, message)
+        except (smtplib.SMTPServerDisconnected, ConnectionError):
+            pool.discard(connection)
+            if not connection.messages_sent:
+                raise
             
-            if not sent:
-                raise Exception(f"Failed to send email to any MX server for {domain}: {last_error}")
+            # The server closed a reused connection between messages; retry once on a new one
+            connection = PooledSMTP(connect())
+            try:
+                connection.server.sendmail(from_email, recipients, message)
+            except Exception:
+                pool.discard(connection)
+                raise
+        except Exception:
+            pool.discard(connection)
+            raise
+        
+        pool.release(key, connection)
+    
+    def close(self):
+        self._delivery_executor.shutdown()
+        self._domain_executor.shutdown()
+        self.relay_pool.close_all()
+        self.mx_pool.close_all()
+        
+        with self._signing_executor_lock:
+            if self._signing_executor is not None:
+                self._signing_executor.shutdown()
+                self._signing_executor = None
     
-    def _sign_message(self, message: MIMEMultipart) -> MIMEMultipart:
+    def _flatten(self, message: MIMEMultipart) -> bytes:
+        buffer = io.BytesIO()
+        BytesGenerator(buffer, policy=SMTP_POLICY).flatten(message)
+        return buffer.getvalue()
+    
+    def _sign_message(self, message: bytes) -> bytes:
         dkim_key = self._load_dkim_key()
         if not dkim_key:
             return message
         
         try:
-            message_string = message.as_string()
-            signature = dkim.sign(
-                message_string.encode(),
-                self.dkim_selector.encode(),
-                self.domain.encode(),
+            signature_header = dkim_signer.sign(
+                message,
+                self._dkim_selector_bytes,
+                self._domain_bytes,
                 dkim_key,
-                include_headers=[b"From", b"To", b"Subject", b"Date", b"Message-ID"]
+                self._dkim_algorithm
             )
-            
-            signature_header = signature.decode().replace("DKIM-Signature: ", "")
-            message["DKIM-Signature"] = signature_header
-            
+            return signature_header + message
+        
         except Exception as e:
             logger.warning(f"Could not sign message with DKIM: {e}")
         
         return message
     
-    def send_email(
+    def _get_signing_executor(self) -> ProcessPoolExecutor:
+        with self._signing_executor_lock:
+            if self._signing_executor is None:
+                # spawn rather than fork: the API process runs the SMTP and webhook threads
+                self._signing_executor = ProcessPoolExecutor(
+                    mp_context=multiprocessing.get_context("spawn")
+                )
+            return self._signing_executor
+    
+    def _sign_messages(self, messages: List[bytes]) -> List[bytes]:
+        if len(messages) < 2:
+            return [self._sign_message(message) for message in messages]
+        
+        dkim_key = self._load_dkim_key()
+        if not dkim_key:
+            return messages
+        
+        sign = partial(
+            dkim_signer.sign,
+            selector=self._dkim_selector_bytes,
+            domain=self._domain_bytes,
+            private_key=dkim_key,
+            signature_algorithm=self._dkim_algorithm
+        )
+        
+        try:
+            signatures = list(self._get_signing_executor().map(sign, messages, chunksize=16))
+        except Exception as e:
+            logger.warning(f"Parallel DKIM signing failed, signing in process: {e}")
+            return [self._sign_message(message) for message in messages]
+        
+        return [
+            signature_header + message
+            for message, signature_header in zip(messages, signatures)
+        ]
+    
+    def persist_pending(
         self,
         db: Session,
         to_email: str,
@@ -118,9 +491,10 @@ class EmailSender:
         from_email: Optional[str] = None,
         cc: Optional[List[str]] = None,
         bcc: Optional[List[str]] = None,
-        attachments: Optional[List[Dict[str, Any]]] = None,
         template_id: Optional[int] = None,
-        template_variables: Optional[Dict[str, Any]] = None
+        template_variables: Optional[Dict[str, Any]] = None,
+        attachments: Optional[List[Dict[str, Any]]] = None,
+        commit: bool = True
     ) -> Email:
         
         if not from_email:
@@ -140,82 +514,217 @@ class EmailSender:
             status=EmailStatus.PENDING,
             direction="outbound",
             template_id=template_id,
-            template_variables=template_variables,
-            created_at=datetime.utcnow()
+            template_variables=template_variables
         )
         db.add(email_record)
-        db.commit()
+        
+        if attachments:
+            db.flush()
         
         try:
-            message = MIMEMultipart("alternative")
-            message["From"] = from_email
-            message["To"] = to_email
-            message["Subject"] = subject
-            message["Message-ID"] = message_id
-            message["Date"] = datetime.utcnow().strftime("%a, %d %b %Y %H:%M:%S +0000")
-            
-            if cc:
-                message["Cc"] = ", ".join(cc)
-            
-            if text_content:
-                part1 = MIMEText(text_content, "plain")
-                message.attach(part1)
-            
-            if html_content:
-                part2 = MIMEText(html_content, "html")
-                message.attach(part2)
-            
             if attachments:
-                for attachment in attachments:
-                    if "content" in attachment and "filename" in attachment:
-                        part = MIMEBase("application", "octet-stream")
-                        part.set_payload(attachment["content"])
-                        encoders.encode_base64(part)
-                        part.add_header(
-                            "Content-Disposition",
-                            f"attachment; filename= {attachment['filename']}"
-                        )
-                        message.attach(part)
+                email_record.attachments = attachment_store.store_attachments(
+                    email_record.id,
+                    attachments
+                ) or None
             
+            if commit:
+                db.commit()
+            else:
+                db.flush()
+        except Exception:
+            # Files written for a row that never committed would be orphaned
+            if attachments:
+                attachment_store.delete(email_record.id)
+            raise
+        
+        return email_record
+    
+    def _text_part(self, content: str, subtype: str, parts: Optional[Dict[tuple, MIMEBase]] = None) -> MIMEBase:
+        if parts is None:
+            return MIMEText(content, subtype)
+        
+        key = (subtype, content)
+        if key not in parts:
+            parts[key] = MIMEText(content, subtype)
+        return parts[key]
+    
+    def _attachment_part(self, attachment: Dict[str, Any], parts: Optional[Dict[tuple, MIMEBase]] = None) -> MIMEBase:
+        content_type = attachment["content_type"] or "application/octet-stream"
+        
+        key = None
+        if parts is not None:
+            key = (hashlib.sha1(attachment["content"]).digest(), attachment["filename"], content_type)
+            if key in parts:
+                return parts[key]
+        
+        maintype, subtype = content_type.split("/", 1)
+        part = MIMEBase(maintype, subtype)
+        part.set_payload(base64.encodebytes(attachment["content"]).decode("ascii"))
+        part["Content-Transfer-Encoding"] = "base64"
+        part.add_header(
+            "Content-Disposition",
+            f"attachment; filename= {attachment['filename']}"
+        )
+        
+        if key is not None:
+            parts[key] = part
+        return part
+    
+    def _build_message(
+        self,
+        email_record: Email,
+        parts: Optional[Dict[tuple, MIMEBase]] = None
+    ) -> MIMEMultipart:
+        message = MIMEMultipart("alternative")
+        message["From"] = email_record.from_email
+        message["To"] = email_record.to_email
+        message["Subject"] = email_record.subject
+        message["Message-ID"] = email_record.message_id
+        message["Date"] = format_datetime(datetime.now(timezone.utc))
+        
+        if email_record.cc:
+            message["Cc"] = ", ".join(email_record.cc)
+        
+        if email_record.text_content:
+            message.attach(self._text_part(email_record.text_content, "plain", parts))
+        
+        if email_record.html_content:
+            message.attach(self._text_part(email_record.html_content, "html", parts))
+        
+        if email_record.attachments:
+            for attachment in attachment_store.load_attachments(email_record.attachments):
+                message.attach(self._attachment_part(attachment, parts))
+        
+        return message
+    
+    def _transmit(self, email_record: Email, message: bytes):
+        from_email = email_record.from_email
+        
+        recipients = [email_record.to_email]
+        if email_record.cc:
+            recipients.extend(email_record.cc)
+        if email_record.bcc:
+            recipients.extend(email_record.bcc)
+        
+        if self.smtp_host:
+            self._send_pooled(
+                self.relay_pool,
+                (self.smtp_host, self.smtp_port, self.use_tls, self.smtp_user),
+                self._connect_relay,
+                message,
+                from_email,
+                recipients
+            )
+        else:
+            self._send_direct(message, from_email, recipients)
+    
+    def _mark_sent(self, email_record: Email):
+        email_record.status = EmailStatus.SENT
+        email_record.sent_at = datetime.now(timezone.utc)
+        logger.info(f"Email sent successfully to {email_record.to_email}")
+    
+    def _mark_failed(self, email_record: Email, error: Exception):
+        email_record.status = EmailStatus.FAILED
+        email_record.error_message = str(error)
+        logger.error(f"Failed to send email to {email_record.to_email}: {error}")
+    
+    def send_email(
+        self,
+        db: Session,
+        email_record: Email
+    ) -> Email:
+        
+        try:
+            message = self._flatten(self._build_message(email_record))
             message = self._sign_message(message)
+            self._transmit(email_record, message)
+            self._mark_sent(email_record)
+        except Exception as e:
+            self._mark_failed(email_record, e)
+        
+        db.commit()
+        
+        return email_record
+    
+    def send_bulk(
+        self,
+        db: Session,
+        email_records: List[Email]
+    ) -> List[Email]:
+        
+        # Messages with the same body or attachments share one encoded MIME part;
+        # only the header block differs from one recipient to the next
+        parts: Dict[tuple, MIMEBase] = {}
+        
+        records = []
+        messages = []
+        for email_record in email_records:
+            try:
+                message = self._build_message(email_record, parts)
+                messages.append(self._flatten(message))
+                records.append(email_record)
+            except Exception as e:
+                self._mark_failed(email_record, e)
+        
+        messages = self._sign_messages(messages)
+        
+        for email_record, message in zip(records, messages):
+            try:
+                self._transmit(email_record, message)
+                self._mark_sent(email_record)
+            except Exception as e:
+                self._mark_failed(email_record, e)
+        
+        db.commit()
+        
+        return email_records
+    
+    def _notify(self, email_record: Email):
+        if email_record.status == EmailStatus.SENT:
+            webhook_queue.enqueue(WebhookEventType.SENT, email_record.id)
+        else:
+            webhook_queue.enqueue(WebhookEventType.FAILED, email_record.id)
+    
+    def deliver(self, email_id: int):
+        db = SessionLocal()
+        try:
+            email_record = db.query(Email).filter(Email.id == email_id).first()
             
-            recipients = [to_email]
-            if cc:
-                recipients.extend(cc)
-            if bcc:
-                recipients.extend(bcc)
-            
-            if self.smtp_host:
-                context = ssl.create_default_context()
-                
-                if self.use_tls:
-                    with smtplib.SMTP(self.smtp_host, self.smtp_port) as server:
-                        server.starttls(context=context)
-                        if self.smtp_user and self.smtp_password:
-                            server.login(self.smtp_user, self.smtp_password)
-                        server.send_message(message, from_email, recipients)
-                else:
-                    with smtplib.SMTP_SSL(self.smtp_host, self.smtp_port, context=context) as server:
-                        if self.smtp_user and self.smtp_password:
-                            server.login(self.smtp_user, self.smtp_password)
-                        server.send_message(message, from_email, recipients)
-            else:
-                self._send_direct(message, from_email, recipients)
+            if not email_record:
+                logger.warning(f"Email {email_id} disappeared before delivery")
+                return
             
-            email_record.status = EmailStatus.SENT
-            email_record.sent_at = datetime.utcnow()
-            db.commit()
+            self.send_email(db, email_record)
+            self._notify(email_record)
+        finally:
+            db.close()
+    
+    async def deliver_async(self, email_id: int):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._delivery_executor, self.deliver, email_id)
+    
+    async def deliver_bulk_async(self, email_ids: List[int]):
+        loop = asyncio.get_running_loop()
+        await loop.run_in_executor(self._delivery_executor, self.deliver_bulk, email_ids)
+    
+    def deliver_bulk(self, email_ids: List[int]):
+        db = SessionLocal()
+        try:
+            email_records = db.query(Email).filter(
+                Email.id.in_(email_ids)
+            ).order_by(Email.id).all()
             
-            logger.info(f"Email sent successfully to {to_email}")
+            self.send_bulk(db, email_records)
             
-        except Exception as e:
-            email_record.status = EmailStatus.FAILED
-            email_record.error_message = str(e)
-            db.commit()
-            logger.error(f"Failed to send email to {to_email}: {e}")
-            raise
-        
-        return email_record
+            sent_ids = [e.id for e in email_records if e.status == EmailStatus.SENT]
+            failed_ids = [e.id for e in email_records if e.status != EmailStatus.SENT]
+            if sent_ids:
+                webhook_queue.enqueue_many(WebhookEventType.SENT, sent_ids)
+            if failed_ids:
+                webhook_queue.enqueue_many(WebhookEventType.FAILED, failed_ids)
+        finally:
+            db.close()
 
 
 email_sender = EmailSender()
\ No newline at end of file
@@ -1,86 +1,193 @@
-from jinja2 import Template, Environment, BaseLoader, TemplateError
+from jinja2 import Template, Environment, BaseLoader, TemplateError, TemplateNotFound
+from jinja2 import FileSystemBytecodeCache
+from jinja2.bccache import bc_magic
+from cachetools import TTLCache
 from typing import Dict, Any, Optional
+from pathlib import Path
 from sqlalchemy.orm import Session
+from app.core.config import settings
 from app.models.email import EmailTemplate
+import marshal
+import os
+import stat
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
 
 
-class DatabaseTemplateLoader(BaseLoader):
-    def __init__(self, db: Session):
-        self.db = db
+class RecordTemplateLoader(BaseLoader):
+    fields = {
+        "subject": "subject",
+        "html": "html_content",
+        "text": "text_content",
+    }
+    
+    def __init__(self):
+        self.records: Dict[str, EmailTemplate] = {}
+    
+    @staticmethod
+    def _version(template_record: EmailTemplate):
+        return (template_record.id, template_record.updated_at)
+    
+    def _uptodate(self, name: str, template: EmailTemplate):
+        version = self._version(template)
+        
+        # render_template seeds the row it was given, so freshness is an in-process comparison
+        def uptodate():
+            current = self.records.get(name)
+            return current is not None and self._version(current) == version
+        
+        return uptodate
     
     def get_source(self, environment, template_name):
-        template = self.db.query(EmailTemplate).filter(
-            EmailTemplate.name == template_name
-        ).first()
+        name, _, part = template_name.rpartition(":")
+        template = self.records.get(name)
         
-        if not template:
-            raise TemplateError(f"Template '{template_name}' not found")
+        if template is None or part not in self.fields:
+            raise TemplateNotFound(template_name)
         
-        source = template.html_content
-        mtime = template.updated_at.timestamp() if template.updated_at else 0
+        source = getattr(template, self.fields[part]) or ""
         
-        def uptodate():
-            current_template = self.db.query(EmailTemplate).filter(
-                EmailTemplate.name == template_name
-            ).first()
-            if not current_template:
-                return False
-            current_mtime = current_template.updated_at.timestamp() if current_template.updated_at else 0
-            return current_mtime == mtime
+        return source, template_name, self._uptodate(name, template)
+    
+    def load(self, environment, template_name, globals=None):
+        name, _, part = template_name.rpartition(":")
+        template = self.records.get(name)
         
-        return source, None, uptodate
+        # Rows compiled at write time skip parsing; a cache written by another
+        # Python or Jinja version falls through to get_source
+        compiled_cache = template.compiled_cache if template is not None else None
+        if compiled_cache and compiled_cache.startswith(bc_magic):
+            code = marshal.loads(compiled_cache[len(bc_magic):]).get(part)
+            if code is not None:
+                return environment.template_class.from_code(
+                    environment,
+                    code,
+                    globals or {},
+                    self._uptodate(name, template)
+                )
+        
+        return super().load(environment, template_name, globals)
 
 
 class TemplateEngine:
-    def __init__(self):
-        self.environment = None
-    
-    def setup(self, db: Session):
-        loader = DatabaseTemplateLoader(db)
+    def __init__(self, cache_size: int = 400):
+        self.loader = RecordTemplateLoader()
         self.environment = Environment(
-            loader=loader,
-            autoescape=True,
-            trim_blocks=True,
-            lstrip_blocks=True
+            loader=self.loader,
+            cache_size=cache_size,
+            auto_reload=True
         )
+        self._by_name = TTLCache(maxsize=1024, ttl=60)
+        self._by_name_lock = threading.Lock()
+        self._bytecode_cache_ready = False
+        self._bytecode_cache_lock = threading.Lock()
+    
+    def _create_bytecode_cache(self) -> Optional[FileSystemBytecodeCache]:
+        if not settings.TEMPLATE_CACHE_DIR:
+            # Jinja's default is a per-user 0700 directory it verifies before use
+            return FileSystemBytecodeCache()
+        
+        cache_dir = Path(settings.TEMPLATE_CACHE_DIR)
+        cache_dir.mkdir(mode=0o700, parents=True, exist_ok=True)
+        
+        # Bytecode is executed on load, so a directory anyone else can write to is never used
+        st = os.lstat(cache_dir)
+        if not stat.S_ISDIR(st.st_mode) or st.st_uid != os.getuid() or st.st_mode & 0o077:
+            logger.warning(
+                f"Not using template cache directory {cache_dir}: "
+                f"it must be a directory owned by this user with mode 0700"
+            )
+            return None
+        
+        return FileSystemBytecodeCache(str(cache_dir))
+    
+    def _ensure_bytecode_cache(self):
+        if self._bytecode_cache_ready:
+            return
+        
+        with self._bytecode_cache_lock:
+            if self._bytecode_cache_ready:
+                return
+            
+            try:
+                self.environment.bytecode_cache = self._create_bytecode_cache()
+            except OSError as e:
+                logger.warning(f"Template bytecode cache disabled: {e}")
+            self._bytecode_cache_ready = True
+    
+    def get_template(self, db: Session, template_name: str) -> Optional[EmailTemplate]:
+        with self._by_name_lock:
+            template = self._by_name.get(template_name)
+        
+        if template is None:
+            template = db.query(EmailTemplate).filter(
+                EmailTemplate.name == template_name
+            ).first()
+            
+            if not template:
+                return None
+            
+            db.expunge(template)
+            with self._by_name_lock:
+                self._by_name[template_name] = template
+        
+        return template
+    
+    def invalidate_template(self, *template_names: str):
+        with self._by_name_lock:
+            for template_name in template_names:
+                self._by_name.pop(template_name, None)
+                self.loader.records.pop(template_name, None)
     
     def render_template(
         self,
-        db: Session,
-        template_name: str,
+        template_record: EmailTemplate,
         variables: Optional[Dict[str, Any]] = None
     ) -> tuple[str, str, str]:
         
-        template_record = db.query(EmailTemplate).filter(
-            EmailTemplate.name == template_name
-        ).first()
-        
-        if not template_record:
-            raise ValueError(f"Template '{template_name}' not found")
-        
         variables = variables or {}
         
         try:
-            html_template = Template(template_record.html_content)
-            html_content = html_template.render(**variables)
+            self._ensure_bytecode_cache()
+            
+            name = template_record.name
+            self.loader.records[name] = template_record
+            
+            html_content = self.environment.get_template(f"{name}:html").render(**variables)
             
             text_content = None
             if template_record.text_content:
-                text_template = Template(template_record.text_content)
-                text_content = text_template.render(**variables)
+                text_content = self.environment.get_template(f"{name}:text").render(**variables)
             
-            subject_template = Template(template_record.subject)
-            subject = subject_template.render(**variables)
+            subject = self.environment.get_template(f"{name}:subject").render(**variables)
             
             return subject, html_content, text_content
-            
+        
         except Exception as e:
-            logger.error(f"Error rendering template '{template_name}': {e}")
+            logger.error(f"Error rendering template '{template_record.name}': {e}")
             raise TemplateError(f"Failed to render template: {e}")
     
+    def compile_template(
+        self,
+        name: str,
+        html_content: str,
+        text_content: Optional[str] = None,
+        subject: Optional[str] = None
+    ) -> bytes:
+        sources = {
+            "html": html_content,
+            "text": text_content,
+            "subject": subject,
+        }
+        code = {
+            part: self.environment.compile(source, f"{name}:{part}", f"{name}:{part}")
+            for part, source in sources.items()
+            if source
+        }
+        return bc_magic + marshal.dumps(code)
+    
     def validate_template(
         self,
         html_content: str,
@@ -101,7 +208,7 @@ class TemplateEngine:
                 Template(subject).render(**test_vars)
             
             return True
-            
+        
         except Exception as e:
             logger.error(f"Template validation failed: {e}")
             raise TemplateError(f"Template validation failed: {e}")
@@ -1,12 +1,15 @@
 import httpx
 import hmac
 import hashlib
-import json
-from datetime import datetime
-from typing import Dict, Any, Optional
+import orjson
+from datetime import datetime, timezone
+from typing import Dict, Any, List, Optional, Tuple
+from cachetools import TTLCache
 from sqlalchemy.orm import Session
 from app.models.email import Email, Webhook, WebhookDelivery, WebhookStatus
+from app.services.attachment_store import attachment_store
 import asyncio
+import threading
 import logging
 
 logger = logging.getLogger(__name__)
@@ -16,34 +19,75 @@ class WebhookService:
     def __init__(self):
         self.max_retries = 3
         self.timeout = 30
+        self._signing_keys: Dict[int, Tuple[str, hmac.HMAC]] = {}
+        self._client: Optional[httpx.AsyncClient] = None
+        self._active_webhooks = TTLCache(maxsize=16, ttl=30)
+        self._active_webhooks_lock = threading.Lock()
     
-    def _generate_signature(self, payload: str, secret: str) -> str:
-        signature = hmac.new(
-            secret.encode(),
-            payload.encode(),
-            hashlib.sha256
-        ).hexdigest()
-        return f"sha256={signature}"
+    def get_client(self) -> httpx.AsyncClient:
+        if self._client is None:
+            self._client = httpx.AsyncClient(
+                # Waiting for a pooled connection does not count against the request timeout
+                timeout=httpx.Timeout(self.timeout, pool=None),
+                http2=True,
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=20)
+            )
+        return self._client
+    
+    async def close(self):
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    def _signing_key(self, webhook: Webhook) -> hmac.HMAC:
+        cached = self._signing_keys.get(webhook.id)
+        if cached is None or cached[0] != webhook.secret_key:
+            cached = (
+                webhook.secret_key,
+                hmac.new(webhook.secret_key.encode(), digestmod=hashlib.sha256)
+            )
+            self._signing_keys[webhook.id] = cached
+        return cached[1]
+    
+    def invalidate_signing_key(self, webhook_id: int):
+        self._signing_keys.pop(webhook_id, None)
+    
+    def get_active_webhooks(self, db: Session, event_type: str) -> List[Webhook]:
+        with self._active_webhooks_lock:
+            webhooks = self._active_webhooks.get(event_type)
+        
+        if webhooks is None:
+            webhooks = db.query(Webhook).filter(
+                Webhook.event_type == event_type,
+                Webhook.active == True
+            ).all()
+            
+            for webhook in webhooks:
+                db.expunge(webhook)
+            with self._active_webhooks_lock:
+                self._active_webhooks[event_type] = webhooks
+        
+        return webhooks
+    
+    def invalidate_active_webhooks(self):
+        with self._active_webhooks_lock:
+            self._active_webhooks.clear()
+    
+    def _generate_signature(self, payload: bytes, webhook: Webhook) -> str:
+        mac = self._signing_key(webhook).copy()
+        mac.update(payload)
+        return f"sha256={mac.hexdigest()}"
     
-    async def send_webhook(
+    def build_request(
         self,
-        db: Session,
         webhook: Webhook,
-        email: Email
-    ) -> WebhookDelivery:
-        
-        delivery = WebhookDelivery(
-            webhook_id=webhook.id,
-            email_id=email.id,
-            status=WebhookStatus.PENDING,
-            created_at=datetime.utcnow()
-        )
-        db.add(delivery)
-        db.commit()
+        email: Email,
+        now: datetime
+    ) -> Tuple[bytes, Dict[str, str]]:
         
         payload = {
             "event": webhook.event_type,
-            "timestamp": datetime.utcnow().isoformat(),
+            "timestamp": now,
             "email": {
                 "id": email.id,
                 "message_id": email.message_id,
@@ -52,14 +96,23 @@ class WebhookService:
                 "subject": email.subject,
                 "status": email.status.value,
                 "direction": email.direction,
-                "created_at": email.created_at.isoformat() if email.created_at else None,
+                "created_at": email.created_at,
                 "html_content": email.html_content,
                 "text_content": email.text_content,
-                "attachments": email.attachments
+                "attachments": (
+                    attachment_store.public_metadata(email.attachments)
+                    if email.attachments
+                    else None
+                )
             }
         }
         
-        payload_json = json.dumps(payload)
+        # Encoded once: the same bytes are signed and sent on every attempt.
+        # Timestamps are normalized to UTC with a Z suffix; sqlite returns created_at naive
+        payload_bytes = orjson.dumps(
+            payload,
+            option=orjson.OPT_UTC_Z | orjson.OPT_NAIVE_UTC
+        )
         headers = {
             "Content-Type": "application/json",
             "User-Agent": "Hermes-Email-Service/1.0"
@@ -70,64 +123,72 @@ class WebhookService:
         
         if webhook.secret_key:
             headers["X-Webhook-Signature"] = self._generate_signature(
-                payload_json,
-                webhook.secret_key
+                payload_bytes,
+                webhook
             )
         
-        async with httpx.AsyncClient() as client:
-            for attempt in range(self.max_retries):
-                delivery.attempts = attempt + 1
+        return payload_bytes, headers
+    
+    async def send_webhook(self, webhook: Webhook, email: Email) -> WebhookDelivery:
+        now = datetime.now(timezone.utc)
+        delivery = WebhookDelivery(
+            webhook_id=webhook.id,
+            email_id=email.id,
+            status=WebhookStatus.PENDING,
+            created_at=now
+        )
+        payload_bytes, headers = self.build_request(webhook, email, now)
+        
+        return await self.post(webhook, delivery, payload_bytes, headers)
+    
+    async def post(
+        self,
+        webhook: Webhook,
+        delivery: WebhookDelivery,
+        payload_bytes: bytes,
+        headers: Dict[str, str]
+    ) -> WebhookDelivery:
+        
+        # Only updates the delivery in memory; callers record the outcome off the event loop
+        
+        client = self.get_client()
+        
+        for attempt in range(self.max_retries):
+            delivery.attempts = attempt + 1
+            
+            try:
+                response = await client.post(
+                    webhook.url,
+                    content=payload_bytes,
+                    headers=headers
+                )
+                
+                delivery.response_status = response.status_code
+                delivery.response_body = response.text[:1000]
                 
-                try:
-                    response = await client.post(
-                        webhook.url,
-                        content=payload_json,
-                        headers=headers,
-                        timeout=self.timeout
-                    )
-                    
-                    delivery.response_status = response.status_code
-                    delivery.response_body = response.text[:1000]
-                    
-                    if 200 <= response.status_code < 300:
-                        delivery.status = WebhookStatus.SUCCESS
-                        delivery.delivered_at = datetime.utcnow()
-                        db.commit()
-                        logger.info(f"Webhook delivered successfully to {webhook.url}")
-                        return delivery
-                    
-                    if attempt == self.max_retries - 1:
-                        delivery.status = WebhookStatus.FAILED
-                        delivery.error_message = f"HTTP {response.status_code}: {response.text[:500]}"
-                        db.commit()
-                        logger.error(f"Webhook delivery failed after {self.max_retries} attempts")
-                        return delivery
-                    
-                except Exception as e:
-                    delivery.error_message = str(e)
-                    
-                    if attempt == self.max_retries - 1:
-                        delivery.status = WebhookStatus.FAILED
-                        db.commit()
-                        logger.error(f"Webhook delivery failed: {e}")
-                        return delivery
+                if 200 <= response.status_code < 300:
+                    delivery.status = WebhookStatus.SUCCESS
+                    delivery.delivered_at = datetime.now(timezone.utc)
+                    logger.info(f"Webhook delivered successfully to {webhook.url}")
+                    return delivery
                 
-                await asyncio.sleep(2 ** attempt)
+                if attempt == self.max_retries - 1:
+                    delivery.status = WebhookStatus.FAILED
+                    delivery.error_message = f"HTTP {response.status_code}: {response.text[:500]}"
+                    logger.error(f"Webhook delivery failed after {self.max_retries} attempts")
+                    return delivery
+            
+            except Exception as e:
+                delivery.error_message = str(e)
+                
+                if attempt == self.max_retries - 1:
+                    delivery.status = WebhookStatus.FAILED
+                    logger.error(f"Webhook delivery failed: {e}")
+                    return delivery
+            
+            await asyncio.sleep(2 ** attempt)
         
         return delivery
 
 
-webhook_service = WebhookService()
-
-
-async def trigger_webhook(db: Session, event_type: str, email: Email):
-    webhooks = db.query(Webhook).filter(
-        Webhook.event_type == event_type,
-        Webhook.active == True
-    ).all()
-    
-    for webhook in webhooks:
-        try:
-            await webhook_service.send_webhook(db, webhook, email)
-        except Exception as e:
-            logger.error(f"Error triggering webhook {webhook.id}: {e}")
\ No newline at end of file
+webhook_service = WebhookService()
\ No newline at end of file
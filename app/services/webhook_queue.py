@@ -0,0 +1,221 @@
+import asyncio
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Tuple
+from sqlalchemy import update
+from sqlalchemy.orm import Session, load_only
+from app.core.database import SessionLocal
+from app.models.email import Email, Webhook, WebhookDelivery, WebhookStatus
+from app.services.webhook import webhook_service
+import logging
+
+logger = logging.getLogger(__name__)
+
+# Bulk sends and multi-recipient inbound mail are split into queue items of this many
+# emails, so one batch cannot occupy a worker while others wait
+EMAILS_PER_ITEM = 10
+# POSTs in flight per worker; with the default 10 workers this matches the HTTP pool size
+POSTS_PER_WORKER = 10
+
+# Columns the webhook payload reads; raw_content and headers can be megabytes
+# on inbound mail and are never sent
+PAYLOAD_COLUMNS = (
+    Email.id,
+    Email.message_id,
+    Email.from_email,
+    Email.to_email,
+    Email.subject,
+    Email.status,
+    Email.direction,
+    Email.created_at,
+    Email.html_content,
+    Email.text_content,
+    Email.attachments
+)
+
+
+class WebhookQueue:
+    def __init__(self):
+        self.queue: Optional[asyncio.Queue[Tuple[str, List[int]]]] = None
+        self.loop: Optional[asyncio.AbstractEventLoop] = None
+        self.workers: List[asyncio.Task] = []
+    
+    def start(self, worker_count: int = 10):
+        self.loop = asyncio.get_running_loop()
+        self.queue = asyncio.Queue()
+        self.workers = [
+            asyncio.create_task(self.worker())
+            for _ in range(worker_count)
+        ]
+    
+    async def stop(self, timeout: float = 10):
+        if not self.queue:
+            return
+        
+        try:
+            await asyncio.wait_for(self.queue.join(), timeout)
+        except asyncio.TimeoutError:
+            logger.warning(f"Dropping {self.queue.qsize()} queued webhook events on shutdown")
+        
+        for task in self.workers:
+            task.cancel()
+        await asyncio.gather(*self.workers, return_exceptions=True)
+        self.queue = None
+    
+    def enqueue(self, event_type: str, email_id: int):
+        self.enqueue_many(event_type, [email_id])
+    
+    def enqueue_many(self, event_type: str, email_ids: List[int]):
+        if not self.queue:
+            logger.warning(f"Webhook queue not running, dropping {event_type} for emails {email_ids}")
+            return
+        
+        for start in range(0, len(email_ids), EMAILS_PER_ITEM):
+            self.loop.call_soon_threadsafe(
+                self.queue.put_nowait,
+                (event_type, email_ids[start:start + EMAILS_PER_ITEM])
+            )
+    
+    async def worker(self):
+        while True:
+            event_type, email_ids = await self.queue.get()
+            try:
+                await self.dispatch(event_type, email_ids)
+            except Exception as e:
+                logger.error(f"Error dispatching {event_type} for emails {email_ids}: {e}")
+            finally:
+                self.queue.task_done()
+    
+    async def dispatch(self, event_type: str, email_ids: List[int]):
+        # Database work runs in a thread so the API event loop only waits on the POSTs
+        requests = await asyncio.to_thread(self._record_pending, event_type, email_ids)
+        if not requests:
+            return
+        
+        semaphore = asyncio.Semaphore(POSTS_PER_WORKER)
+        
+        async def post(webhook, delivery, payload_bytes, headers):
+            async with semaphore:
+                return await webhook_service.post(webhook, delivery, payload_bytes, headers)
+        
+        results = await asyncio.gather(
+            *[post(*request) for request in requests],
+            return_exceptions=True
+        )
+        
+        for (webhook, _, _, _), result in zip(requests, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error triggering webhook {webhook.id}: {result}")
+        
+        await asyncio.to_thread(
+            self._record_results,
+            [delivery for _, delivery, _, _ in requests]
+        )
+    
+    def _record_pending(
+        self,
+        event_type: str,
+        email_ids: List[int]
+    ) -> List[Tuple[Webhook, WebhookDelivery, bytes, Dict[str, str]]]:
+        
+        db = SessionLocal()
+        try:
+            webhooks = webhook_service.get_active_webhooks(db, event_type)
+            if not webhooks:
+                return []
+            
+            emails = db.query(Email).options(
+                load_only(*PAYLOAD_COLUMNS)
+            ).filter(Email.id.in_(email_ids)).all()
+            rows = [(webhook, email) for email in emails for webhook in webhooks]
+            
+            now = datetime.now(timezone.utc)
+            deliveries = self._insert_deliveries(db, [
+                {
+                    "webhook_id": webhook.id,
+                    "email_id": email.id,
+                    "status": WebhookStatus.PENDING,
+                    "created_at": now
+                }
+                for webhook, email in rows
+            ])
+            
+            requests = []
+            for (webhook, email), delivery in zip(rows, deliveries):
+                if delivery is None:
+                    continue
+                payload_bytes, headers = webhook_service.build_request(webhook, email, now)
+                requests.append((webhook, delivery, payload_bytes, headers))
+            
+            return requests
+        finally:
+            db.close()
+    
+    def _insert_deliveries(
+        self,
+        db: Session,
+        values: List[Dict[str, Any]]
+    ) -> List[Optional[WebhookDelivery]]:
+        
+        deliveries = [WebhookDelivery(**row) for row in values]
+        try:
+            db.add_all(deliveries)
+            db.commit()
+            return deliveries
+        except Exception as e:
+            db.rollback()
+            logger.warning(f"Recording {len(values)} webhook deliveries failed, retrying one by one: {e}")
+        
+        # One bad row (e.g. a webhook deleted while still cached) must not sink the batch;
+        # rows that cannot be recorded are not sent
+        deliveries = []
+        for row in values:
+            delivery = WebhookDelivery(**row)
+            try:
+                db.add(delivery)
+                db.commit()
+                # Detached so a later rollback in this loop does not expire it
+                db.expunge(delivery)
+                deliveries.append(delivery)
+            except Exception as e:
+                db.rollback()
+                logger.error(f"Skipping webhook {row['webhook_id']} for email {row['email_id']}: {e}")
+                deliveries.append(None)
+        
+        return deliveries
+    
+    def _record_results(self, deliveries: List[WebhookDelivery]):
+        values = [
+            {
+                "id": delivery.id,
+                "status": delivery.status,
+                "attempts": delivery.attempts,
+                "response_status": delivery.response_status,
+                "response_body": delivery.response_body,
+                "error_message": delivery.error_message,
+                "delivered_at": delivery.delivered_at
+            }
+            for delivery in deliveries
+        ]
+        
+        db = SessionLocal()
+        try:
+            try:
+                db.execute(update(WebhookDelivery), values)
+                db.commit()
+                return
+            except Exception as e:
+                db.rollback()
+                logger.warning(f"Updating {len(values)} webhook deliveries failed, retrying one by one: {e}")
+            
+            for row in values:
+                try:
+                    db.execute(update(WebhookDelivery), [row])
+                    db.commit()
+                except Exception as e:
+                    db.rollback()
+                    logger.error(f"Could not record result of webhook delivery {row['id']}: {e}")
+        finally:
+            db.close()
+
+
+webhook_queue = WebhookQueue()
\ No newline at end of file
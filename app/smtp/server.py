@@ -1,35 +1,79 @@
 import asyncio
 import email
+from email import policy
+from email.header import decode_header, make_header
 from email.message import EmailMessage
 from aiosmtpd.controller import Controller
 from aiosmtpd.smtp import SMTP as SMTPServer
-from datetime import datetime
+from datetime import datetime, timezone
 import json
 import uuid
 from typing import Optional
 from app.core.database import SessionLocal
-from app.models.email import Email, EmailStatus
-from app.services.webhook import trigger_webhook
+from app.models.email import Email, EmailStatus, WebhookEventType
+from app.services.webhook_queue import webhook_queue
 import logging
 
+try:
+    import uvloop
+except ImportError:
+    uvloop = None
+
 logger = logging.getLogger(__name__)
 
 
 class EmailHandler:
+    @staticmethod
+    def _raw_text(value: str) -> str:
+        # Undecodable header bytes come back as surrogate escapes; store them as UTF-8 with replacement
+        return value.encode("utf-8", errors="surrogateescape").decode("utf-8", errors="replace")
+    
+    @classmethod
+    def _decoded_text(cls, value: str) -> str:
+        try:
+            return str(make_header(decode_header(value)))
+        except Exception:
+            return cls._raw_text(value)
+    
+    @staticmethod
+    def _attachment_size(part) -> int:
+        # Size from the encoded payload, without decoding the attachment itself
+        raw = part.get_payload(decode=False)
+        if str(part.get("Content-Transfer-Encoding", "")).lower() != "base64":
+            return len(raw)
+        
+        encoded = "".join(raw.split())
+        padding = len(encoded) - len(encoded.rstrip("="))
+        return len(encoded) * 3 // 4 - padding
+    
     async def handle_RCPT(self, server, session, envelope, address, rcpt_options):
         envelope.rcpt_tos.append(address)
         return '250 OK'
-
+    
     async def handle_DATA(self, server, session, envelope):
         try:
-            message_data = envelope.content.decode('utf8', errors='replace')
-            msg = email.message_from_string(message_data)
+            message_data = envelope.content
+            # compat32 never parses header structure, so malformed headers are kept rather than rejected
+            msg = email.message_from_bytes(message_data, policy=policy.compat32)
+            raw_headers = msg.raw_items()
             
             from_email = envelope.mail_from
             to_emails = envelope.rcpt_tos
             
-            message_id = msg.get('Message-ID', str(uuid.uuid4()))
-            subject = msg.get('Subject', 'No Subject')
+            message_id = None
+            subject = None
+            headers = {}
+            for key, value in raw_headers:
+                name = key.lower()
+                if name == 'message-id':
+                    message_id = message_id or self._raw_text(value).strip()
+                elif name == 'subject':
+                    subject = subject or self._decoded_text(value)
+                elif name not in ['from', 'to']:
+                    headers[key] = self._raw_text(value)
+            
+            message_id = message_id or str(uuid.uuid4())
+            subject = subject or 'No Subject'
             
             html_content = None
             text_content = None
@@ -41,10 +85,11 @@ class EmailHandler:
                     content_disposition = str(part.get("Content-Disposition", ""))
                     
                     if "attachment" in content_disposition:
+                        filename = part.get_filename()
                         attachments.append({
-                            'filename': part.get_filename(),
+                            'filename': filename and self._raw_text(filename),
                             'content_type': content_type,
-                            'size': len(part.get_payload())
+                            'size': self._attachment_size(part)
                         })
                     elif content_type == "text/plain":
                         text_content = part.get_payload(decode=True).decode('utf-8', errors='replace')
@@ -60,40 +105,42 @@ class EmailHandler:
                     else:
                         text_content = content
             
-            headers = {}
-            for key, value in msg.items():
-                if key.lower() not in ['from', 'to', 'subject', 'message-id']:
-                    headers[key] = value
+            received_at = datetime.now(timezone.utc)
+            email_records = [
+                Email(
+                    message_id=f"{message_id}-{to_email}",
+                    from_email=from_email,
+                    to_email=to_email,
+                    subject=subject,
+                    html_content=html_content,
+                    text_content=text_content,
+                    raw_content=message_data,
+                    headers=headers,
+                    attachments=attachments if attachments else None,
+                    status=EmailStatus.RECEIVED,
+                    direction="inbound",
+                    received_at=received_at
+                )
+                for to_email in to_emails
+            ]
             
             db = SessionLocal()
             try:
-                for to_email in to_emails:
-                    email_record = Email(
-                        message_id=f"{message_id}-{to_email}",
-                        from_email=from_email,
-                        to_email=to_email,
-                        subject=subject,
-                        html_content=html_content,
-                        text_content=text_content,
-                        raw_content=message_data,
-                        headers=headers,
-                        attachments=attachments if attachments else None,
-                        status=EmailStatus.RECEIVED,
-                        direction="inbound",
-                        received_at=datetime.utcnow()
-                    )
-                    db.add(email_record)
-                    db.commit()
-                    db.refresh(email_record)
-                    
-                    await trigger_webhook(db, "email.received", email_record)
-                    
-                    logger.info(f"Email received from {from_email} to {to_email}")
+                db.add_all(email_records)
+                db.commit()
+                
+                webhook_queue.enqueue_many(
+                    WebhookEventType.RECEIVED,
+                    [email_record.id for email_record in email_records]
+                )
             finally:
                 db.close()
             
-            return '250 Message accepted for delivery'
+            for to_email in to_emails:
+                logger.info(f"Email received from {from_email} to {to_email}")
             
+            return '250 Message accepted for delivery'
+        
         except Exception as e:
             logger.error(f"Error processing email: {str(e)}")
             return '554 Transaction failed'
@@ -103,6 +150,7 @@ class SMTPServerManager:
     def __init__(self, host: str = "0.0.0.0", port: int = 2525):
         self.host = host
         self.port = port
+        self.data_size_limit = 52428800
         self.controller = None
     
     def start(self):
@@ -110,7 +158,10 @@ class SMTPServerManager:
         self.controller = Controller(
             handler,
             hostname=self.host,
-            port=self.port
+            port=self.port,
+            loop=uvloop.new_event_loop() if uvloop else None,
+            ready_timeout=3.0,
+            data_size_limit=self.data_size_limit
         )
         self.controller.start()
         logger.info(f"SMTP server started on {self.host}:{self.port}")